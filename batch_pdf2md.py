@@ -132,8 +132,8 @@ def classify_book(doc):
 # ============================================================
 
 def _page_lines(page):
-    """Extract text lines with their max font size and line box (PDF points,
-    y/height for the pixel analysis), in document order."""
+    """Extract text lines with their word count, max font size and line box
+    (PDF points, y/height for the pixel analysis), in document order."""
     lines = []
     for block in page.get_text("dict")["blocks"]:
         if block.get("type") != 0:  # 0 = text block
@@ -143,8 +143,10 @@ def _page_lines(page):
             if not spans:
                 continue
             x0, y0, x1, y1 = ln["bbox"]
+            text = " ".join(s["text"].strip() for s in spans)
             lines.append({
-                'text': " ".join(s["text"].strip() for s in spans),
+                'text': text,
+                'word_count': len(text.split()),
                 'size': max(s["size"] for s in spans),
                 'y': y0,
                 'height': y1 - y0,
@@ -180,8 +182,8 @@ def _save_render_as_jpg(page, out_path):
     img = _render_page(page, cm.PDF_DPI).convert('RGB')
     if img.width > cm.IMAGE_MAX_WIDTH:
         ratio = cm.IMAGE_MAX_WIDTH / img.width
-        img = img.resize((cm.IMAGE_MAX_WIDTH, int(img.height * ratio)), Image.LANCZOS)
-    img.save(out_path, format='JPEG', quality=cm.IMAGE_QUALITY, optimize=True)
+        img = img.resize((cm.IMAGE_MAX_WIDTH, int(img.height * ratio)), Image.BILINEAR)
+    img.save(out_path, format='JPEG', quality=cm.IMAGE_QUALITY)
 
 
 def convert_text_book(pdf_path, doc, out_dir):
@@ -200,20 +202,20 @@ def convert_text_book(pdf_path, doc, out_dir):
 
         # Pixel page analysis on a moderate-DPI render, text lines scaled to it
         zoom = ANALYZE_DPI / 72.0
-        arr = np.array(_render_page(page, ANALYZE_DPI))
+        gray = np.asarray(_render_page(page, ANALYZE_DPI).convert('L'))
         scaled = [{'text': l['text'],
+                   'word_count': l['word_count'],
                    'y': int(l['y'] * zoom),
                    'height': max(1, int(l['height'] * zoom))} for l in lines]
 
-        gray = arr[:, :, :3].mean(axis=2) if arr.ndim == 3 else arr
         if (gray < 245).mean() < 0.01:
             page_type = 'text'  # blank page: nothing to save
         else:
-            page_type = cm.analyze_page_array(arr, scaled)
+            page_type = cm.analyze_page_array(gray, scaled)
             # Union with the raster-image signal: embedded raster charts whose
             # thin lines the pixel analysis cannot see still get their page saved.
             if page_type == 'text' and _raster_image_coverage(page) >= MIXED_IMAGE_COVERAGE:
-                word_count = sum(len(l['text'].split()) for l in lines)
+                word_count = sum(l['word_count'] for l in lines)
                 page_type = 'mixed' if word_count >= cm.MIN_TEXT_WORDS else 'image'
         stats[page_type] += 1
 
@@ -232,7 +234,7 @@ def convert_text_book(pdf_path, doc, out_dir):
                 text = l['text'].strip()
                 if not text:
                     continue
-                stats['words'] += len(text.split())
+                stats['words'] += l['word_count']
                 if median_size > 0 and l['size'] > median_size * 1.4:
                     md.append(f"## {text}")
                 else:
@@ -304,20 +306,23 @@ def convert_scan_book(pdf_path, out_dir, ocr_workers):
         for i, (file, ocr_lines) in enumerate(zip(files, ocr_results)):
             page_num = i + 1
             ocr_lines = cm.detect_headings(ocr_lines)
-            stats['words'] += sum(len(l['text'].split()) for l in ocr_lines)
-
-            page_type = cm.analyze_page(file, ocr_lines)
-            stats[page_type] += 1
+            stats['words'] += sum(l['word_count'] for l in ocr_lines)
 
             md.append(f"<!-- Seite {page_num} -->")
             md.append("")
 
-            if page_type in ('image', 'mixed'):
-                img_name = f"page_{page_num:04d}.jpg"
-                cm.save_page_image(file, out_dir / img_name)
-                stats['images_saved'] += 1
-                md.append(f"![Seite {page_num}]({img_name})")
-                md.append("")
+            # Decode the page once for both the analysis and the JPEG save
+            with Image.open(file) as img:
+                img.load()
+                page_type = cm.analyze_page(img, ocr_lines)
+                stats[page_type] += 1
+
+                if page_type in ('image', 'mixed'):
+                    img_name = f"page_{page_num:04d}.jpg"
+                    cm.save_page_image(img, out_dir / img_name)
+                    stats['images_saved'] += 1
+                    md.append(f"![Seite {page_num}]({img_name})")
+                    md.append("")
 
             for line in ocr_lines:
                 text = line['text'].strip()
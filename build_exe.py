@@ -11,11 +11,14 @@ Creates standalone executables:
 - create_pdf.exe - Creates searchable PDF from captured pages
 
 Build time: 5-10 minutes per EXE
-Output: dist/
+Output: dist/ (--dev: dist/<name>.dist/<name>.exe, no onefile packing)
 
 Author: Claude
 """
 
+import argparse
+import hashlib
+import importlib.metadata
 import os
 import shutil
 import subprocess
@@ -39,27 +42,75 @@ def log_section(title):
     print(f"  {title}")
     print('=' * 60 + '\n')
 
-def build_exe(project_root, script_name, exe_name, packages):
-    """Build a single executable with Nuitka"""
+def exe_path(dist_dir, exe_name, dev):
+    """Location of a built EXE: dist/<exe> (release, onefile) or
+    dist/<stem>.dist/<exe> (dev, standalone folder)"""
+    if dev:
+        return dist_dir / f"{Path(exe_name).stem}.dist" / exe_name
+    return dist_dir / exe_name
+
+def delete_old_exe(exe_file):
+    """Delete a previously built EXE (exits if it is locked)."""
+    if not exe_file.exists():
+        return
+    old_size = exe_file.stat().st_size / (1024 * 1024)
+    log_progress(f"Loesche alte {exe_file.name} ({old_size:.2f} MB)...", 'PROGRESS')
+    # A just-killed process may hold the file for a moment -> retry briefly
+    deadline = time.time() + 2.0
+    while exe_file.exists() and time.time() < deadline:
+        try:
+            exe_file.unlink()
+        except PermissionError:
+            time.sleep(0.1)
+    if exe_file.exists():
+        log_progress(f"FEHLER: Konnte {exe_file.name} nicht loeschen!", 'ERROR')
+        sys.exit(1)
+
+def source_hash(project_root, script_path, cmd):
+    """SHA-256 over everything that determines a build: the script, all
+    top-level project modules it may import, the Nuitka version and the
+    complete Nuitka command line (flags, packages, dev/release)."""
+    h = hashlib.sha256()
+    for path in [script_path] + sorted(project_root.glob("*.py")):
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    h.update(importlib.metadata.version("nuitka").encode())
+    h.update("\0".join(cmd).encode())
+    return h.hexdigest()
+
+def prepare_build(project_root, script_name, exe_name, packages, dev=False):
+    """Prepare the Nuitka build of a single executable: assemble the command
+    and delete the old EXE. Nothing is started yet - main() prepares all
+    builds first, so a locked old EXE exits before any Nuitka process runs.
+    dev=True builds the standalone folder only - no onefile compression at
+    build time and no self-extraction at every launch.
+    If sources, Nuitka version and command are unchanged since the last
+    successful build (dist/<exe>.hash) and the EXE exists, the build is
+    skipped. Returns a build handle for start_build(), or None on error."""
     dist_dir = project_root / "dist"
     script_path = project_root / script_name
 
     if not script_path.exists():
         log_progress(f"FEHLER: Script nicht gefunden: {script_path}", 'ERROR')
-        return False
+        return None
 
-    log_progress(f"Starte Nuitka Build fuer {exe_name}...", 'PROGRESS')
-    log_progress("Dies kann einige Minuten dauern (Python -> C Kompilierung)...", 'INFO')
+    log_path = dist_dir / f"{Path(exe_name).stem}.build.log"
+    hash_path = dist_dir / f"{exe_name}.hash"
+    exe_file = exe_path(dist_dir, exe_name, dev)
 
-    nuitka_start_time = time.time()
+    # Both builds run at the same time -> each gets half of the cores
+    jobs = max(1, (os.cpu_count() or 2) // 2)
 
     cmd = [
         sys.executable, "-m", "nuitka",
         "--standalone",
-        "--onefile",
-        "--jobs=24",
+        f"--jobs={jobs}",
         "--assume-yes-for-downloads",
-        "--remove-output",
+        "--lto=yes",                        # Cross-module inlining of the generated C
+        "--python-flag=no_site",            # No site.py import at startup
+        "--python-flag=no_asserts",         # Strip assert statements
+        "--python-flag=no_docstrings",      # Strip docstrings (smaller EXE)
+        "--prefer-source-code",             # Compile .py instead of using .pyd extension modules
         "--output-dir=" + str(dist_dir),
         f"--output-filename={exe_name}",
         "--company-name=Quantrosoft Pte. Ltd.",
@@ -71,29 +122,91 @@ def build_exe(project_root, script_name, exe_name, packages):
         "--trademarks=Quantrosoft is a trademark of Quantrosoft Pte. Ltd.",
     ]
 
+    if not dev:
+        cmd += ["--onefile", "--remove-output"]
+
     for pkg in packages:
         cmd.append(f"--include-package={pkg}")
 
     cmd.append(str(script_path))
 
+    build_hash = source_hash(project_root, script_path, cmd)
+    if exe_file.exists() and hash_path.exists() and hash_path.read_text() == build_hash:
+        log_progress(f"{exe_name} ist aktuell (Quellen unveraendert) - Build uebersprungen", 'OK')
+        return {'process': None, 'exe_file': exe_file, 'exe_name': exe_name}
+
+    # Stale hash must not survive a failed build
+    if hash_path.exists():
+        hash_path.unlink()
+    delete_old_exe(exe_file)
+
+    return {
+        'process': None,
+        'cmd': cmd,
+        'log_path': log_path,
+        'exe_file': exe_file,
+        'exe_name': exe_name,
+        'hash_path': hash_path,
+        'hash': build_hash,
+    }
+
+def start_build(build):
+    """Start a prepared Nuitka build in the background. Nuitka's console
+    output goes to dist/<name>.build.log (the builds run in parallel).
+    Returns the build handle for wait_build(), or None on error."""
+    if build is None or 'cmd' not in build:  # Error or up to date
+        return build
+
+    log_path = build['log_path']
+    log_progress(f"Starte Nuitka Build fuer {build['exe_name']} (Log: {log_path.name})...", 'PROGRESS')
+    log_file = open(log_path, 'w', encoding='utf-8')
     try:
-        subprocess.check_call(cmd)
-    except subprocess.CalledProcessError as e:
-        log_progress(f"Nuitka Build fehlgeschlagen: {e}", 'ERROR')
+        build['process'] = subprocess.Popen(build['cmd'], stdout=log_file, stderr=subprocess.STDOUT)
+    except Exception as e:
+        log_file.close()
+        log_progress(f"FEHLER: Nuitka konnte nicht gestartet werden: {build['exe_name']} ({e})", 'ERROR')
+        return None
+    build['log_file'] = log_file
+    build['start_time'] = time.time()
+    return build
+
+def wait_build(build):
+    """Wait for a build started by start_build(). Returns True on success."""
+    if build is None:
+        return False
+    if build['process'] is None:  # Up to date, not rebuilt
+        return True
+
+    returncode = build['process'].wait()
+    build['log_file'].close()
+    exe_name = build['exe_name']
+
+    if returncode != 0:
+        log_progress(f"Nuitka Build fehlgeschlagen: {exe_name} (Exit-Code {returncode}, siehe {build['log_path']})", 'ERROR')
         return False
 
-    nuitka_duration = time.time() - nuitka_start_time
-    exe_file = dist_dir / exe_name
+    nuitka_duration = time.time() - build['start_time']
+    exe_file = build['exe_file']
 
     if exe_file.exists():
         exe_size = exe_file.stat().st_size / (1024 * 1024)
         log_progress(f"Build abgeschlossen: {exe_name} ({exe_size:.2f} MB, {nuitka_duration:.1f}s)", 'OK')
+        build['hash_path'].write_text(build['hash'])
         return True
     else:
         log_progress(f"Build fehlgeschlagen: {exe_name}", 'ERROR')
         return False
 
 def main():
+    parser = argparse.ArgumentParser(description="Build Kindle Capture Tools EXEs with Nuitka")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--release", dest="dev", action="store_false",
+                      help="Onefile EXEs in dist/ (Standard)")
+    mode.add_argument("--dev", dest="dev", action="store_true",
+                      help="Schneller Entwicklungs-Build: dist/<name>.dist/<name>.exe ohne Onefile")
+    args = parser.parse_args()
+    dev = args.dev
+
     print('\n' * 10)
     print('=' * 60)
     print('   KINDLE TO PDF - BUILD PROCESS')
@@ -105,39 +218,30 @@ def main():
     build_dir = project_root / "build"
 
     log_section('Kindle to PDF - EXE Build (Nuitka)')
-    log_progress('Build gestartet', 'INFO')
+    log_progress(f"Build gestartet ({'dev' if dev else 'release'})", 'INFO')
 
     # Kill any running processes
     log_progress('Pruefe laufende Prozesse...', 'PROGRESS')
     if sys.platform == 'win32':
+        # One taskkill per EXE (incl. child processes, /T): a combined call
+        # fails as soon as one image is not running, so its return code
+        # cannot tell which EXE was actually terminated
         for exe in ['kindle_capture.exe', 'create_pdf.exe']:
             try:
                 result = subprocess.run(
-                    ['taskkill', '/F', '/IM', exe],
+                    ['taskkill', '/F', '/T', '/IM', exe],
                     capture_output=True,
                     text=True
                 )
                 if result.returncode == 0:
                     log_progress(f'{exe} beendet', 'OK')
-                    time.sleep(1)
             except Exception:
                 pass
 
-    # Clean previous builds
+    # Clean previous builds (old EXEs are deleted per build in prepare_build,
+    # only if they are actually rebuilt)
     log_progress('Bereinige alte Build-Artefakte...', 'PROGRESS')
 
-    if dist_dir.exists():
-        for exe_name in ['kindle_capture.exe', 'create_pdf.exe']:
-            exe_file = dist_dir / exe_name
-            if exe_file.exists():
-                old_size = exe_file.stat().st_size / (1024 * 1024)
-                log_progress(f"Loesche alte {exe_name} ({old_size:.2f} MB)...", 'PROGRESS')
-                exe_file.unlink()
-                time.sleep(1)
-                if exe_file.exists():
-                    log_progress(f"FEHLER: Konnte {exe_name} nicht loeschen!", 'ERROR')
-                    sys.exit(1)
-
     if build_dir.exists():
         log_progress("Bereinige build/ Verzeichnis...", 'PROGRESS')
         shutil.rmtree(build_dir)
@@ -151,7 +255,15 @@ def main():
         ccache_exe = ccache_dir / "ccache.exe"
         os.environ["PATH"] = str(ccache_dir) + os.pathsep + os.environ["PATH"]
         os.environ["NUITKA_CCACHE_BINARY"] = str(ccache_exe)
-        log_progress(f"ccache konfiguriert: {ccache_exe}", 'OK')
+        # Project-local cache, large enough for both EXEs (no LRU eviction
+        # between them); mtime/__TIME__ changes of generated files still hit
+        os.environ.update({
+            "CCACHE_DIR": str(project_root / ".ccache"),
+            "CCACHE_MAXSIZE": "20G",
+            "CCACHE_COMPRESS": "1",
+            "CCACHE_SLOPPINESS": "time_macros,include_file_mtime",
+        })
+        log_progress(f"ccache konfiguriert: {ccache_exe} (Cache: {os.environ['CCACHE_DIR']})", 'OK')
     else:
         log_progress("ccache nicht gefunden (Build wird langsamer sein)", 'INFO')
 
@@ -165,8 +277,9 @@ def main():
         subprocess.check_call([sys.executable, "-m", "pip", "install", "nuitka", "zstandard"])
         log_progress("Nuitka installiert", 'OK')
 
-    # Build kindle_capture.exe
-    log_section('Build: kindle_capture.exe')
+    # Build kindle_capture.exe and create_pdf.exe in parallel (independent builds)
+    log_section('Build: kindle_capture.exe + create_pdf.exe')
+    log_progress("Dies kann einige Minuten dauern (Python -> C Kompilierung)...", 'INFO')
     capture_packages = [
         "pyautogui",
         "pygetwindow",
@@ -176,16 +289,21 @@ def main():
         "win32gui",
         "win32ui",
     ]
-    success1 = build_exe(project_root, "kindle_capture.py", "kindle_capture.exe", capture_packages)
-
-    # Build create_pdf.exe
-    log_section('Build: create_pdf.exe')
     pdf_packages = [
         "PIL",
+        "numpy",
         "reportlab",
         "winsdk",
     ]
-    success2 = build_exe(project_root, "create_pdf.py", "create_pdf.exe", pdf_packages)
+    # Delete both old EXEs before starting either build: a locked EXE exits
+    # here, before any Nuitka process could be left running
+    capture_build = prepare_build(project_root, "kindle_capture.py", "kindle_capture.exe", capture_packages, dev)
+    pdf_build = prepare_build(project_root, "create_pdf.py", "create_pdf.exe", pdf_packages, dev)
+    capture_build = start_build(capture_build)
+    pdf_build = start_build(pdf_build)
+
+    success1 = wait_build(capture_build)
+    success2 = wait_build(pdf_build)
 
     success = success1 and success2
 
@@ -193,24 +311,26 @@ def main():
     log_progress("Erstelle Batch-Dateien...", 'PROGRESS')
 
     # Capture batch - uses %~dp0 for portable relative path to batch file's directory
+    capture_exe = exe_path(dist_dir, "kindle_capture.exe", dev).relative_to(dist_dir)
     capture_batch = dist_dir / "capture_book.bat"
-    capture_batch.write_text('''@echo off
+    capture_batch.write_text(f'''@echo off
 REM Kindle Book Capture
 REM Usage: Run from the target folder where pages should be saved
 
-"%~dp0kindle_capture.exe"
+"%~dp0{capture_exe}"
 
 pause
 ''')
     log_progress(f"capture_book.bat erstellt", 'OK')
 
     # PDF batch
+    pdf_exe = exe_path(dist_dir, "create_pdf.exe", dev).relative_to(dist_dir)
     pdf_batch = dist_dir / "create_pdf.bat"
-    pdf_batch.write_text('''@echo off
+    pdf_batch.write_text(f'''@echo off
 REM Create PDF from captured pages
 REM Usage: Run from the folder containing page_*.png files
 
-"%~dp0create_pdf.exe"
+"%~dp0{pdf_exe}"
 
 pause
 ''')
@@ -222,7 +342,7 @@ pause
     log_section('Build-Ergebnis')
 
     for exe_name in ['kindle_capture.exe', 'create_pdf.exe']:
-        exe = dist_dir / exe_name
+        exe = exe_path(dist_dir, exe_name, dev)
         if exe.exists():
             size = exe.stat().st_size / (1024 * 1024)
             print(f"  {exe_name}: {size:.2f} MB")
@@ -23,17 +23,26 @@ Usage:
 Author: Claude
 """
 
+import os
 import sys
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from PIL import Image
 import numpy as np
 
+from create_markdown import row_stats, longest_run
+
 # ============================================================
 # Configuration
 # ============================================================
 MIN_TEXT_WORDS = 10         # Minimum words to consider "has text"
 
+# ![...](page_NNNN.jpg) image reference in the .md (group 1 = file name),
+# plus its trailing newline for removal
+_IMAGE_REF_RE = re.compile(r'!\[[^\]]*\]\(([^)]+\.jpg)\)\n?')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
 # ============================================================
 # Page Analysis (pixel-based)
 # ============================================================
@@ -47,36 +56,29 @@ def is_text_only_image(img_path):
     Returns True if the image should be removed."""
     try:
         img = Image.open(img_path)
-        img_array = np.array(img)
 
-        if len(img_array.shape) == 3:
-            gray = np.mean(img_array[:, :, :3], axis=2)
-        else:
-            gray = img_array.astype(float)
-
-        height, width = gray.shape
+        # For JPEGs draft() makes libjpeg decode straight to grayscale instead
+        # of decoding full-size RGB first. Analyzed at full resolution: on a
+        # reduced copy, tight line gaps blur into one tall content run and
+        # text-only pages would be kept as graphics.
+        img.draft('L', img.size)
+        gray = np.asarray(img.convert('L'))
 
         # Minimum graphic height: ~2x typical text line height
         min_gfx_height = 60
 
         # Row-level analysis
-        row_var = np.var(gray, axis=1)
-        row_mean = np.mean(gray, axis=1)
+        row_mean, row_var = row_stats(gray)
         # A row has content if it has visual variation AND is not pure white
         content_rows = (row_var > 100) & (row_mean < 245)
 
-        # Find max consecutive content rows
+        # Too few content rows in total for any graphic -> text-only, no run scan
+        if np.count_nonzero(content_rows) <= min_gfx_height:
+            return True
+
+        # Look for a run of consecutive content rows taller than a graphic
         # Text: short bursts (~20px per line), graphics: tall blocks (>60px)
-        max_consecutive = 0
-        current = 0
-        for c in content_rows:
-            if c:
-                current += 1
-                max_consecutive = max(max_consecutive, current)
-            else:
-                current = 0
-
-        if max_consecutive > min_gfx_height:
+        if longest_run(content_rows) > min_gfx_height:
             return False  # Has a graphic region -> keep
 
         return True  # Text-only -> remove
@@ -86,15 +88,25 @@ def is_text_only_image(img_path):
         return False
 
 
-def cleanup_markdown_folder(md_dir):
+def cleanup_markdown_folder(md_dir, pool):
     """Remove text-only images from a markdown folder and update .md file.
+    The referenced images are analyzed in parallel on `pool` (a
+    ProcessPoolExecutor - decode + numpy analysis is CPU-bound).
     Returns (total_images, removed_count)."""
-    jpgs = sorted(md_dir.glob("page_*.jpg"))
+    # Page images and .md file from ONE directory enumeration
+    jpgs, md_files = [], []
+    with os.scandir(md_dir) as entries:
+        for e in entries:
+            name = e.name.lower()
+            if name.startswith('page_') and name.endswith('.jpg'):
+                jpgs.append(Path(e.path))
+            elif name.endswith('.md'):
+                md_files.append(Path(e.path))
     if not jpgs:
         return 0, 0
+    jpgs.sort()
 
     # Find the .md file
-    md_files = list(md_dir.glob("*.md"))
     if not md_files:
         return 0, 0
     md_file = md_files[0]
@@ -102,34 +114,29 @@ def cleanup_markdown_folder(md_dir):
     md_content = md_file.read_text(encoding='utf-8')
 
     # Step 1: Find which images are referenced in the .md file
-    referenced = set(re.findall(r'!\[[^\]]*\]\(([^)]+\.jpg)\)', md_content))
+    referenced = set(_IMAGE_REF_RE.findall(md_content))
 
-    to_remove = []
+    # Unreferenced images -> remove silently
+    to_remove = [jpg for jpg in jpgs if jpg.name not in referenced]
 
-    for jpg in jpgs:
-        filename = jpg.name
-        if filename not in referenced:
-            # Unreferenced image -> remove silently
-            to_remove.append(jpg)
-        else:
-            # Referenced but text-only -> remove with reference cleanup
-            if is_text_only_image(jpg):
-                to_remove.append(jpg)
+    # Referenced but text-only -> remove with reference cleanup
+    to_check = [jpg for jpg in jpgs if jpg.name in referenced]
+    text_only = pool.map(is_text_only_image, to_check, chunksize=8)
+    to_remove += [jpg for jpg, remove in zip(to_check, text_only) if remove]
 
     if not to_remove:
         return len(jpgs), 0
 
-    # Remove images and update .md content
+    # Remove the ![...](...) lines referencing removed images (if they exist)
+    # in ONE pass over the .md content, then delete the files
+    removed_names = {jpg.name for jpg in to_remove}
+    md_content = _IMAGE_REF_RE.sub(
+        lambda m: '' if m.group(1) in removed_names else m.group(0), md_content)
     for jpg in to_remove:
-        filename = jpg.name
-        # Remove the ![...](...) line referencing this image (if exists)
-        pattern = rf'!\[[^\]]*\]\({re.escape(filename)}\)\n?'
-        md_content = re.sub(pattern, '', md_content)
-        # Delete the file
         jpg.unlink()
 
     # Clean up double blank lines
-    md_content = re.sub(r'\n{3,}', '\n\n', md_content)
+    md_content = _BLANK_LINES_RE.sub('\n\n', md_content)
 
     md_file.write_text(md_content, encoding='utf-8')
 
@@ -171,15 +178,16 @@ def main():
     total_images = 0
     total_removed = 0
 
-    for md_dir in md_dirs:
-        book_name = md_dir.parent.name
-        images_count, removed_count = cleanup_markdown_folder(md_dir)
-        total_images += images_count
-        total_removed += removed_count
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        for md_dir in md_dirs:
+            book_name = md_dir.parent.name
+            images_count, removed_count = cleanup_markdown_folder(md_dir, pool)
+            total_images += images_count
+            total_removed += removed_count
 
-        if images_count > 0:
-            kept = images_count - removed_count
-            print(f"  {book_name}: {images_count} Bilder, {removed_count} entfernt, {kept} behalten")
+            if images_count > 0:
+                kept = images_count - removed_count
+                print(f"  {book_name}: {images_count} Bilder, {removed_count} entfernt, {kept} behalten")
 
     print()
     print("=" * 60)
@@ -44,6 +44,7 @@ import os
 import subprocess
 import tempfile
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from PIL import Image
 import numpy as np
@@ -65,6 +66,11 @@ MIN_TEXT_WORDS = 10         # Minimum words to consider a page as "text page"
 PDF_DPI = 200               # DPI for rendering PDF pages as images
 OCR_SUBPROCESS_RETRIES = 4  # Retries when a page's isolated OCR subprocess crashes
 OCR_SUBPROCESS_TIMEOUT = 90 # Seconds per page OCR subprocess before giving up
+ANALYSIS_WIDTH = 600        # Wider pages are box-reduced to at least this width before analysis
+
+# This script, re-invoked with --ocr-one for the per-page OCR subprocesses
+# (resolved once - not per page)
+_OCR_ONE_CMD = [sys.executable, str(Path(__file__).resolve()), "--ocr-one"]
 
 # Windows OCR imports
 try:
@@ -136,6 +142,7 @@ async def ocr_image_async(engine, img_path):
                     rect = words[0].bounding_rect
                     lines.append({
                         'text': line_text,
+                        'word_count': line_text.count(' ') + 1,  # words are joined by single spaces
                         'y': int(rect.y),
                         'height': int(rect.height),
                     })
@@ -172,7 +179,7 @@ def ocr_image(engine, img_path):
     which also sidesteps any console-encoding (cp1252) issues.
 
     `engine` is unused here - the subprocess creates its own engine."""
-    cmd = [sys.executable, str(Path(__file__).resolve()), "--ocr-one", str(img_path)]
+    cmd = [*_OCR_ONE_CMD, str(img_path)]
     for _ in range(OCR_SUBPROCESS_RETRIES):
         try:
             proc = subprocess.run(cmd, capture_output=True, text=True,
@@ -185,8 +192,8 @@ def ocr_image(engine, img_path):
             except json.JSONDecodeError:
                 pass  # garbled output -> retry
         # non-zero exit (e.g. native crash) or empty/garbled output -> retry
-    print(f"  [WARNUNG] OCR nach {OCR_SUBPROCESS_RETRIES} Versuchen fehlgeschlagen "
-          f"(Seite uebersprungen)", end=" ")
+    print(f"  [WARNUNG] {Path(img_path).name}: OCR nach {OCR_SUBPROCESS_RETRIES} "
+          f"Versuchen fehlgeschlagen (Seite uebersprungen)", flush=True)
     return []
 
 
@@ -231,35 +238,76 @@ def extract_pdf_pages(pdf_path, temp_dir, dpi=PDF_DPI):
 # Page Analysis
 # ============================================================
 
-def analyze_page(img_path, ocr_lines):
-    """Analyze whether a page image FILE is text-heavy, image-heavy, or mixed.
-    Thin wrapper around analyze_page_array - see there for the method."""
-    return analyze_page_array(np.array(Image.open(img_path)), ocr_lines)
+def _open_image(img_or_path):
+    """Image.open for a path; an already-opened PIL Image is passed through, so
+    a page decoded once can be analyzed and saved without decoding it again."""
+    if isinstance(img_or_path, Image.Image):
+        return img_or_path
+    return Image.open(img_or_path)
 
 
-def analyze_page_array(img_array, ocr_lines):
-    """Analyze whether a page (as a numpy image array) is text-heavy,
+def analyze_page(img_or_path, ocr_lines):
+    """Analyze whether a page image (file path or PIL Image) is text-heavy,
     image-heavy, or mixed.
+    Thin wrapper around analyze_page_array - see there for the method.
+
+    Large pages (e.g. 200 DPI PDF renders) are box-reduced first; the OCR line
+    boxes stay in full-resolution pixels and analyze_page_array maps them with
+    the reduction factor, so the row analysis gives the same verdict on far
+    fewer pixels."""
+    img = _open_image(img_or_path).convert('L')
+    factor = max(1, img.width // ANALYSIS_WIDTH)
+    if factor > 1:
+        img = img.reduce(factor)
+    return analyze_page_array(np.asarray(img), ocr_lines, factor)
+
+
+def row_stats(gray):
+    """Per-row mean and variance of a 2D uint8 image in one fused pass over
+    integer row sums (sum and sum of squares) - unlike np.mean + np.var, no
+    full-size float64 temporaries are allocated.
+    Shared with cleanup_images.py."""
+    width = gray.shape[1]
+    row_sum = gray.sum(axis=1, dtype=np.int64)
+    row_sq = np.einsum('ij,ij->i', gray, gray, dtype=np.int64)
+    row_mean = row_sum / width
+    return row_mean, row_sq / width - row_mean * row_mean
+
+
+def longest_run(flags):
+    """Length of the longest run of consecutive True entries in a 1D bool
+    array, from the rising/falling edges of the flags (vectorized).
+    Shared with cleanup_images.py."""
+    d = np.diff(np.concatenate(([0], flags.view(np.int8), [0])))
+    starts = np.flatnonzero(d == 1)
+    ends = np.flatnonzero(d == -1)
+    return int((ends - starts).max()) if starts.size else 0
+
+
+def analyze_page_array(gray, ocr_lines, factor=1):
+    """Analyze whether a page (as a 2D grayscale uint8 numpy array, e.g.
+    np.asarray(img.convert('L'))) is text-heavy, image-heavy, or mixed.
 
     Uses the text line regions (from OCR or a PDF text layer - anything with
-    'text', 'y', 'height' entries in image coordinates) to mask known text
-    areas. Remaining non-text, non-empty areas that span at least 2x text line
-    height are graphics.
+    'text', 'word_count', 'y', 'height' entries in image coordinates) to mask
+    known text areas. Remaining non-text, non-empty areas that span at least
+    2x text line height are graphics.
+
+    `factor`: gray is the page box-reduced by this factor while the line boxes
+    are in full-resolution pixels. All thresholds (line heights, graphic height,
+    text coverage) are evaluated in full-resolution pixels; only the row masks
+    are mapped down to the reduced rows.
 
     Returns:
         'text'  - mostly text, no need to save image
         'image' - mostly image/chart/diagram, save image
         'mixed' - has both significant text and images
     """
-    if len(img_array.shape) == 3:
-        gray = np.mean(img_array[:, :, :3], axis=2)
-    else:
-        gray = img_array.astype(float)
-
     height, width = gray.shape
+    full_height = height * factor
 
     # Count words from OCR
-    word_count = sum(len(line['text'].split()) for line in ocr_lines)
+    word_count = sum(line['word_count'] for line in ocr_lines)
 
     # Very few words -> likely a chart/diagram page
     if word_count < MIN_TEXT_WORDS:
@@ -271,51 +319,53 @@ def analyze_page_array(img_array, ocr_lines):
     min_gfx_height = text_line_h * 2  # graphics must be at least 2x line height
 
     # Row-level analysis: which rows have content (not empty)?
-    row_var = np.var(gray, axis=1)
-    row_mean = np.mean(gray, axis=1)
+    row_mean, row_var = row_stats(gray)
     # A row has content if it has visual variation AND is not pure white
     content_rows = (row_var > 100) & (row_mean < 245)
 
     # Mask out rows covered by OCR text lines (these are known text, not graphics)
-    text_row_mask = np.zeros(height, dtype=bool)
-    for line in ocr_lines:
-        y_start = line.get('y', 0)
-        h_line = line.get('height', 0)
-        if h_line < 5:
-            continue
-        y_end = min(height, y_start + h_line)
-        text_row_mask[y_start:y_end] = True
+    # Line start/end events (+1/-1) summed up per row: row is covered where the
+    # running count of open lines is > 0 - one vectorized pass for all lines.
+    # Lines are filtered in full-resolution pixels, then mapped to every reduced
+    # row they touch.
+    spans = np.array([(line.get('y', 0), line.get('height', 0)) for line in ocr_lines
+                      if line.get('height', 0) >= 5], dtype=np.int64).reshape(-1, 2)
+    y_start = np.clip(spans[:, 0] // factor, 0, height)
+    y_end = np.clip(-(-(spans[:, 0] + spans[:, 1]) // factor), 0, height)
+    events = np.zeros(height + 1, dtype=np.int32)
+    np.add.at(events, y_start, 1)
+    np.add.at(events, y_end, -1)
+    text_row_mask = np.cumsum(events[:-1]) > 0
 
     # Non-text content rows = potential graphics
     gfx_rows = content_rows & ~text_row_mask
 
     # Find max consecutive non-text content rows
-    max_consecutive = 0
-    current = 0
-    for g in gfx_rows:
-        if g:
-            current += 1
-            max_consecutive = max(max_consecutive, current)
-        else:
-            current = 0
+    max_consecutive = longest_run(gfx_rows)
 
-    has_graphics = max_consecutive > min_gfx_height
+    has_graphics = max_consecutive * factor > min_gfx_height
 
     # Decision
     if not has_graphics:
         return 'text'
 
     text_coverage = sum(l['height'] for l in ocr_lines)
-    text_coverage_ratio = text_coverage / height if height > 0 else 0
+    text_coverage_ratio = text_coverage / full_height if full_height > 0 else 0
 
     if text_coverage_ratio < 0.15:
         return 'image'   # Very little text + graphics = image page
     return 'mixed'       # Both text and graphics
 
 
-def save_page_image(img_path, output_path, max_width=IMAGE_MAX_WIDTH, quality=IMAGE_QUALITY):
-    """Save page as compressed JPEG for markdown reference."""
-    img = Image.open(img_path)
+def save_page_image(img_or_path, output_path, max_width=IMAGE_MAX_WIDTH, quality=IMAGE_QUALITY):
+    """Save page (file path or PIL Image) as compressed JPEG for markdown reference."""
+    img = _open_image(img_or_path)
+
+    # JPEG source not decoded yet: let libjpeg decode directly at 1/2, 1/4, ...
+    # scale (DCT scaling, never below max_width) - no-op for PNGs and for
+    # images that are already loaded
+    if max_width and img.width > max_width:
+        img.draft('RGB', (max_width, img.height * max_width // img.width))
 
     # Convert to RGB
     if img.mode in ('RGBA', 'P'):
@@ -325,9 +375,9 @@ def save_page_image(img_path, output_path, max_width=IMAGE_MAX_WIDTH, quality=IM
     if max_width and img.width > max_width:
         ratio = max_width / img.width
         new_height = int(img.height * ratio)
-        img = img.resize((max_width, new_height), Image.LANCZOS)
+        img = img.resize((max_width, new_height), Image.BILINEAR)
 
-    img.save(output_path, format='JPEG', quality=quality, optimize=True)
+    img.save(output_path, format='JPEG', quality=quality)
     return output_path.stat().st_size
 
 
@@ -350,10 +400,28 @@ def detect_headings(lines):
     return lines
 
 
+def _analyze_and_save_page(img_path, ocr_lines, jpg_path):
+    """Classify one page and save its JPEG if it is an image/mixed page.
+    The page is decoded once and shared by the analysis and the JPEG save.
+    Returns (page_type, jpg_filename_or_None, jpg_size_or_None)."""
+    with Image.open(img_path) as img:
+        img.load()
+        page_type = analyze_page(img, ocr_lines)
+        if page_type in ('image', 'mixed'):
+            return page_type, jpg_path.name, save_page_image(img, jpg_path)
+    return page_type, None, None
+
+
 # ============================================================
 # Markdown Generation
 # ============================================================
 
+def _is_page_png(name):
+    """page_*.png (case-insensitive like glob on Windows)."""
+    name = name.lower()
+    return name.startswith('page_') and name.endswith('.png')
+
+
 def find_input_pages(folder):
     """Find page images: PNGs in pages/ subfolder, or extract from PDF.
     Returns (list_of_files, temp_dir_or_None, source_description)."""
@@ -361,17 +429,27 @@ def find_input_pages(folder):
     # Priority 1: PNGs in pages/ subfolder (Kindle screenshots)
     pages_dir = folder / "pages"
     if pages_dir.exists():
-        files = sorted(pages_dir.glob("page_*.png"))
+        with os.scandir(pages_dir) as entries:
+            files = sorted(Path(e.path) for e in entries if _is_page_png(e.name))
         if files:
             return files, None, f"pages/ ({len(files)} PNGs)"
 
+    # Priority 2 + 3 from ONE enumeration of the folder root
+    files, pdfs = [], []
+    with os.scandir(folder) as entries:
+        for e in entries:
+            if _is_page_png(e.name):
+                files.append(Path(e.path))
+            elif e.name.lower().endswith('.pdf'):
+                pdfs.append(Path(e.path))
+
     # Priority 2: PNGs in folder root
-    files = sorted(folder.glob("page_*.png"))
+    files.sort()
     if files:
         return files, None, f"root ({len(files)} PNGs)"
 
     # Priority 3: PDF file
-    pdfs = sorted(folder.glob("*.pdf"))
+    pdfs.sort()
     if pdfs:
         pdf_path = pdfs[0]  # Use first PDF found
         temp_dir = tempfile.mkdtemp(prefix="kindle_md_")
@@ -404,6 +482,10 @@ def create_markdown(output_folder):
             shutil.rmtree(temp_dir, ignore_errors=True)
         return False
     print(f"[INFO] OCR Sprache: {lang_info}")
+    # Pin the resolved language for the per-page OCR subprocesses: each one
+    # creates its engine with this single tag instead of probing the list again
+    if lang_info != "system-default":
+        os.environ['KINDLE_OCR_LANG'] = lang_info
 
     # Create output directory
     md_dir = folder / "markdown"
@@ -415,69 +497,90 @@ def create_markdown(output_folder):
     print(f"[INFO] Ausgabe: {md_dir}")
     print()
 
-    # Process pages
-    md_lines = []
-    md_lines.append(f"# {book_name}\n")
-    md_lines.append("")
-
     stats = {'text': 0, 'image': 0, 'mixed': 0, 'total_words': 0, 'images_saved': 0}
 
+    def emit_page(md_file, page_num, file, ocr_lines, analysis):
+        """Write one finished page (OCR lines + analysis result) to the markdown."""
+        def emit(line):
+            md_file.write(line)
+            md_file.write("\n")
+
+        page_type, img_filename, img_size = analysis.result()
+        stats[page_type] += 1
+
+        word_count = sum(l['word_count'] for l in ocr_lines)
+        stats['total_words'] += word_count
+
+        print(f"[{page_num}/{len(files)}] {file.name}...", end=" ")
+
+        # Page separator
+        emit(f"<!-- Seite {page_num} -->")
+        emit("")
+
+        # Image reference for image/mixed pages
+        if img_filename:
+            stats['images_saved'] += 1
+            emit(f"![Seite {page_num}]({img_filename})")
+            emit("")
+            print(f"{page_type} ({word_count} Woerter, Bild: {img_size//1024}KB)", end="")
+        else:
+            print(f"text ({word_count} Woerter)", end="")
+
+        # Add OCR text
+        if ocr_lines:
+            for line in ocr_lines:
+                text = line['text'].strip()
+                if not text:
+                    continue
+
+                if line.get('is_heading', False):
+                    emit(f"## {text}")
+                else:
+                    emit(text)
+            emit("")
+
+        print(" OK", flush=True)
+
+    # Pages are streamed to <book>.md.part as they finish (partial progress is
+    # on disk if the run dies); renamed to <book>.md only on success, so
+    # scan.bat never mistakes an aborted run for a finished one.
+    md_part = md_path.with_name(md_path.name + ".part")
+
     try:
-        for i, file in enumerate(files):
-            page_num = i + 1
-            print(f"[{page_num}/{len(files)}] {file.name}...", end=" ", flush=True)
-
-            # OCR
-            ocr_lines = ocr_image(engine, file)
-            ocr_lines = detect_headings(ocr_lines)
-
-            word_count = sum(len(l['text'].split()) for l in ocr_lines)
-            stats['total_words'] += word_count
-
-            # Analyze page type via pixel analysis + OCR word count
-            page_type = analyze_page(file, ocr_lines)
-            stats[page_type] += 1
-
-            # Page separator
-            md_lines.append(f"<!-- Seite {page_num} -->")
-            md_lines.append("")
-
-            # Save image for image/mixed pages
-            if page_type in ('image', 'mixed'):
-                img_filename = f"page_{page_num:04d}.jpg"
-                img_path = md_dir / img_filename
-                img_size = save_page_image(file, img_path)
-                stats['images_saved'] += 1
-
-                md_lines.append(f"![Seite {page_num}]({img_filename})")
-                md_lines.append("")
-                print(f"{page_type} ({word_count} Woerter, Bild: {img_size//1024}KB)", end="")
-            else:
-                print(f"text ({word_count} Woerter)", end="")
-
-            # Add OCR text
-            if ocr_lines:
-                for line in ocr_lines:
-                    text = line['text'].strip()
-                    if not text:
-                        continue
-
-                    if line.get('is_heading', False):
-                        md_lines.append(f"## {text}")
-                    else:
-                        md_lines.append(text)
-                md_lines.append("")
-
-            print(" OK")
+        # Two-stage pipeline: while the OCR subprocess of page N runs (the main
+        # thread just waits on it), the worker thread analyzes and saves page N-1.
+        # Pages are emitted strictly in order.
+        with open(md_part, 'w', encoding='utf-8', buffering=1 << 20) as md_file, \
+                ThreadPoolExecutor(max_workers=1) as pool:
+            md_file.write(f"# {book_name}\n\n\n")
+
+            pending = None  # (page_num, file, ocr_lines, analysis future)
+            for i, file in enumerate(files):
+                page_num = i + 1
+
+                # OCR
+                ocr_lines = ocr_image(engine, file)
+                ocr_lines = detect_headings(ocr_lines)
+
+                # Analyze page type via pixel analysis + OCR word count, save
+                # the image for image/mixed pages (on the worker thread)
+                analysis = pool.submit(_analyze_and_save_page, file, ocr_lines,
+                                       md_dir / f"page_{page_num:04d}.jpg")
+
+                if pending:
+                    emit_page(md_file, *pending)
+                pending = (page_num, file, ocr_lines, analysis)
+
+            if pending:
+                emit_page(md_file, *pending)
 
     finally:
         # Clean up temp dir if we extracted from PDF
         if temp_dir:
             shutil.rmtree(temp_dir, ignore_errors=True)
 
-    # Write markdown file
-    md_content = "\n".join(md_lines)
-    md_path.write_text(md_content, encoding='utf-8')
+    # Complete -> publish the markdown file
+    os.replace(md_part, md_path)
 
     # Calculate sizes
     md_size = md_path.stat().st_size
@@ -25,11 +25,17 @@ Requirements:
 Author: Claude
 """
 
+import os
 import sys
 import asyncio
+import functools
 import io
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from PIL import Image
+import numpy as np
 from reportlab.pdfgen import canvas
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
@@ -41,13 +47,21 @@ from reportlab.lib.utils import ImageReader
 JPEG_QUALITY = 75  # JPEG quality (1-100), 75 is good balance
 MAX_WIDTH = 1400   # Max image width in pixels (None to disable)
 SCALE_FACTOR = 0.75  # PDF scale factor
+PIPELINE_DEPTH = 4   # Pages OCR'd + compressed ahead of the PDF writer
+
+# Font for the invisible OCR text layer - the TTF is parsed once at import
+try:
+    pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))
+    _FONT_NAME = 'Arial'
+except:
+    _FONT_NAME = 'Helvetica'
 
 # Windows OCR imports
 try:
     from winsdk.windows.media.ocr import OcrEngine
     from winsdk.windows.globalization import Language
-    from winsdk.windows.graphics.imaging import BitmapDecoder
-    from winsdk.windows.storage import StorageFile
+    from winsdk.windows.graphics.imaging import SoftwareBitmap, BitmapPixelFormat, BitmapAlphaMode
+    from winsdk.windows.storage.streams import DataWriter
     WINDOWS_OCR_AVAILABLE = True
 except ImportError:
     WINDOWS_OCR_AVAILABLE = False
@@ -56,8 +70,10 @@ except ImportError:
 # Windows OCR
 # ============================================================
 
+@functools.lru_cache(maxsize=1)
 def check_ocr_languages():
-    """Check available OCR languages and return the best engine."""
+    """Check available OCR languages and return the best engine.
+    Probed once per process; later calls return the same engine."""
     if not WINDOWS_OCR_AVAILABLE:
         return None, "winsdk nicht installiert"
 
@@ -83,23 +99,25 @@ def check_ocr_languages():
     return None, "Keine OCR-Sprache installiert"
 
 
-async def ocr_image_async(engine, img_path):
-    """Perform OCR using Windows OCR asynchronously."""
-    try:
-        # Convert path to absolute Windows path
-        abs_path = str(Path(img_path).resolve())
+_ocr_loop = None
+_ocr_loop_lock = threading.Lock()
 
-        # Open file via Windows Storage API
-        storage_file = await StorageFile.get_file_from_path_async(abs_path)
 
-        # Open stream and decode image
-        stream = await storage_file.open_read_async()
-        decoder = await BitmapDecoder.create_async(stream)
+def to_software_bitmap(img):
+    """Copy an already decoded PIL image into a BGRA8 SoftwareBitmap - no file
+    access and no second (WinRT) PNG decode."""
+    writer = DataWriter()
+    writer.write_bytes(img.convert('RGBA').tobytes('raw', 'BGRA'))
+    return SoftwareBitmap.create_copy_from_buffer(
+        writer.detach_buffer(), BitmapPixelFormat.BGRA8,
+        img.width, img.height, BitmapAlphaMode.PREMULTIPLIED)
 
-        # Get SoftwareBitmap
-        bitmap = await decoder.get_software_bitmap_async()
 
-        # Perform OCR
+async def ocr_image_async(engine, bitmap):
+    """Perform OCR on a SoftwareBitmap using Windows OCR asynchronously.
+    Concurrency is bounded by the page pipeline: at most PIPELINE_DEPTH pages
+    (and so recognize calls) are in flight at once."""
+    try:
         result = await engine.recognize_async(bitmap)
 
         words = []
@@ -122,15 +140,26 @@ async def ocr_image_async(engine, img_path):
         return []
 
 
-def ocr_image_windows(engine, img_path):
-    """Synchronous wrapper for Windows OCR."""
+def _get_ocr_loop():
+    """The one event loop all OCR coroutines run on, in a background thread
+    (created on first use, lives until the process exits)."""
+    global _ocr_loop
+    with _ocr_loop_lock:
+        if _ocr_loop is None:
+            _ocr_loop = asyncio.new_event_loop()
+            threading.Thread(target=_ocr_loop.run_forever, daemon=True).start()
+        return _ocr_loop
+
+
+def ocr_image_windows(engine, img):
+    """Synchronous wrapper for Windows OCR of a decoded PIL image. Callable
+    from any thread: the coroutine is scheduled on the shared OCR loop, so
+    concurrent pages' WinRT awaits interleave on one loop instead of one new
+    loop per page."""
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(ocr_image_async(engine, img_path))
-        finally:
-            loop.close()
+        bitmap = to_software_bitmap(img)
+        future = asyncio.run_coroutine_threadsafe(ocr_image_async(engine, bitmap), _get_ocr_loop())
+        return future.result()
     except Exception as e:
         print(f"[WARNUNG] OCR fehlgeschlagen: {e}", end=" ")
         return []
@@ -139,10 +168,10 @@ def ocr_image_windows(engine, img_path):
 # PDF Creation
 # ============================================================
 
-def compress_image_to_jpeg(img_path, max_width=MAX_WIDTH, quality=JPEG_QUALITY):
-    """Load image, optionally resize, and compress to JPEG in memory.
-    Returns (ImageReader, original_width, original_height, new_width, new_height)."""
-    img = Image.open(img_path)
+def compress_image_to_jpeg(img, max_width=MAX_WIDTH, quality=JPEG_QUALITY):
+    """Optionally resize a decoded PIL image and compress it to JPEG in memory.
+    Returns (jpeg_bytes, original_width, original_height, new_width, new_height).
+    Thread-safe: the ImageReader for reportlab is built by the caller."""
     orig_width, orig_height = img.size
 
     # Convert to RGB if necessary (JPEG doesn't support alpha)
@@ -155,14 +184,59 @@ def compress_image_to_jpeg(img_path, max_width=MAX_WIDTH, quality=JPEG_QUALITY):
         ratio = max_width / orig_width
         new_width = max_width
         new_height = int(orig_height * ratio)
+        # 2x+ shrink: integer box-decimate first, Lanczos only for the rest
+        factor = orig_width // new_width
+        if factor >= 2:
+            img = img.reduce(factor)
         img = img.resize((new_width, new_height), Image.LANCZOS)
 
     # Compress to JPEG in memory
     buffer = io.BytesIO()
-    img.save(buffer, format='JPEG', quality=quality, optimize=True)
-    buffer.seek(0)
+    img.save(buffer, format='JPEG', quality=quality, subsampling=2)
+
+    return buffer.getvalue(), orig_width, orig_height, new_width, new_height
+
+
+class JpegImageReader(ImageReader):
+    """ImageReader for in-memory JPEG bytes. reportlab embeds the JPEG stream
+    as-is (DCTDecode), but Canvas.drawImage calls getRGBData() only to compute
+    the image's de-duplication digest - which would decode the whole JPEG to
+    RGB. The compressed bytes identify the image just as well."""
+
+    def __init__(self, jpeg_bytes):
+        super().__init__(io.BytesIO(jpeg_bytes))
+        self._jpeg_bytes = jpeg_bytes
+        self._dataA = None  # No alpha channel (no soft mask)
+
+    def getRGBData(self):
+        return self._jpeg_bytes
+
+
+def process_page(engine, file):
+    """Read and decode one page ONCE and run OCR and JPEG compression on it.
+    The file is read in one sequential read on the worker thread (prefetched
+    PIPELINE_DEPTH pages ahead of the PDF writer).
+    Returns (file_size, words, (jpeg_bytes, orig_w, orig_h, new_w, new_h))."""
+    data = file.read_bytes()
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        # OCR on original image (before compression)
+        words = ocr_image_windows(engine, img)
+        return len(data), words, compress_image_to_jpeg(img)
+
 
-    return ImageReader(buffer), orig_width, orig_height, new_width, new_height
+def _pipelined_pages(pool, engine, files):
+    """Yield (file, future of process_page) per page in order, keeping up to
+    PIPELINE_DEPTH pages in flight on `pool` (OCR awaits WinRT, PIL releases
+    the GIL while decoding and encoding)."""
+    def submit(file):
+        return file, pool.submit(process_page, engine, file)
+
+    window = deque(submit(file) for file in files[:PIPELINE_DEPTH])
+    for file in files[PIPELINE_DEPTH:]:
+        yield window.popleft()
+        window.append(submit(file))
+    yield from window
 
 
 def create_pdf(output_folder):
@@ -198,9 +272,9 @@ def create_pdf(output_folder):
     output_filename = folder.name + ".pdf"
     output_path = folder / output_filename
 
-    # Get dimensions from first image
-    first_img = Image.open(files[0])
-    orig_width, orig_height = first_img.size
+    # Get dimensions from first image (header only, no pixel decode)
+    with Image.open(files[0]) as first_img:
+        orig_width, orig_height = first_img.size
 
     # Calculate scaled dimensions
     if MAX_WIDTH and orig_width > MAX_WIDTH:
@@ -218,59 +292,72 @@ def create_pdf(output_folder):
     print(f"[INFO] Ausgabe: {output_path}")
     print()
 
-    c = canvas.Canvas(str(output_path), pagesize=(page_width, page_height))
-
-    try:
-        pdfmetrics.registerFont(TTFont('Arial', 'arial.ttf'))
-        font_name = 'Arial'
-    except:
-        font_name = 'Helvetica'
+    # Always zlib-compress the page content streams (OCR text layer), independent
+    # of the reportlab rl_config default
+    c = canvas.Canvas(str(output_path), pagesize=(page_width, page_height), pageCompression=1)
 
     pages_processed = 0
     total_original_size = 0
     total_compressed_size = 0
 
-    for i, file in enumerate(files):
-        print(f"[{i+1}/{len(files)}] {file.name}...", end=" ", flush=True)
-
-        # Track original file size
-        total_original_size += file.stat().st_size
-
-        # OCR on original image (before compression)
-        words = ocr_image_windows(engine, file)
-
-        # Compress image and add to PDF
-        img_reader, orig_w, orig_h, new_w, new_h = compress_image_to_jpeg(file)
-
-        # Calculate scale factors for OCR coordinates
-        ocr_scale_x = (new_w / orig_w) * SCALE_FACTOR if orig_w != new_w else SCALE_FACTOR
-        ocr_scale_y = (new_h / orig_h) * SCALE_FACTOR if orig_h != new_h else SCALE_FACTOR
-
-        c.drawImage(img_reader, 0, 0, width=page_width, height=page_height)
-
-        if words:
-            text_object = c.beginText()
-            text_object.setTextRenderMode(3)  # Invisible
-            text_object.setFont(font_name, 10)
-
-            for text, x, y, w, h in words:
-                pdf_x = x * ocr_scale_x
-                pdf_y = page_height - (y + h) * ocr_scale_y
-
-                font_size = max(h * ocr_scale_y * 0.8, 6)
-
-                text_object.setFont(font_name, font_size)
-                text_object.setTextOrigin(pdf_x, pdf_y)
-                try:
-                    text_object.textOut(text + " ")
-                except:
-                    pass
-
-            c.drawText(text_object)
-
-        c.showPage()
-        pages_processed = i + 1
-        print(f"OK ({len(words)} Woerter)")
+    # Pipeline: OCR and JPEG compression of the next PIPELINE_DEPTH pages run on
+    # worker threads; the main thread writes the finished pages to the PDF
+    # strictly in order.
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        for i, (file, page_future) in enumerate(_pipelined_pages(pool, engine, files)):
+            print(f"[{i+1}/{len(files)}] {file.name}...", end=" ", flush=True)
+
+            file_size, words, (jpeg_bytes, orig_w, orig_h, new_w, new_h) = page_future.result()
+
+            # Track original file size
+            total_original_size += file_size
+
+            # Compressed image -> PDF
+            img_reader = JpegImageReader(jpeg_bytes)
+
+            # Calculate scale factors for OCR coordinates
+            ocr_scale_x = (new_w / orig_w) * SCALE_FACTOR if orig_w != new_w else SCALE_FACTOR
+            ocr_scale_y = (new_h / orig_h) * SCALE_FACTOR if orig_h != new_h else SCALE_FACTOR
+
+            c.drawImage(img_reader, 0, 0, width=page_width, height=page_height)
+
+            if words:
+                text_object = c.beginText()
+                text_object.setTextRenderMode(3)  # Invisible
+                text_object.setFont(_FONT_NAME, 10)
+
+                # PDF coordinates and font sizes of all words in one batch
+                boxes = np.array([word[1:] for word in words], dtype=np.float64)  # x, y, w, h
+                xs = boxes[:, 0] * ocr_scale_x
+                ys = page_height - (boxes[:, 1] + boxes[:, 3]) * ocr_scale_y
+                sizes = np.round(np.maximum(boxes[:, 3] * ocr_scale_y * 0.8, 6), 1)
+
+                # Only emit text-state changes: the font only when the (rounded)
+                # size changes, a relative move (Td) instead of a new text
+                # matrix for the next word on the same baseline
+                cur_size = 10
+                cur_x = cur_y = None
+                for (text, *_), pdf_x, pdf_y, font_size in zip(words, xs.tolist(), ys.tolist(), sizes.tolist()):
+                    if font_size != cur_size:
+                        text_object.setFont(_FONT_NAME, font_size)
+                        cur_size = font_size
+
+                    if pdf_y == cur_y:
+                        text_object.moveCursor(pdf_x - cur_x, 0)
+                    else:
+                        text_object.setTextOrigin(pdf_x, pdf_y)
+                        cur_y = pdf_y
+                    cur_x = pdf_x
+                    try:
+                        text_object.textOut(text + " ")
+                    except:
+                        pass
+
+                c.drawText(text_object)
+
+            c.showPage()
+            pages_processed = i + 1
+            print(f"OK ({len(words)} Woerter)")
 
     c.save()
 
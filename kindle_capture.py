@@ -42,10 +42,16 @@ Author: Claude
 
 import pyautogui
 pyautogui.FAILSAFE = False  # Disable fail-safe (mouse in corner)
+pyautogui.PAUSE = 0         # No implicit 0.1s pause per call - every wait is an explicit sleep/poll
 import pygetwindow as gw
+import os
 import time
 import sys
 import signal
+import threading
+import ctypes
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 import numpy as np
 from pathlib import Path
@@ -66,14 +72,78 @@ except ImportError as e:
     print(f"[FEHLER] Details: {e}")
     sys.exit(1)
 
+_user32 = ctypes.WinDLL('user32', use_last_error=True)
+
+
+# SendInput structures. The union must include MOUSEINPUT (its largest member),
+# otherwise sizeof(INPUT) is wrong and SendInput rejects the whole batch.
+class _MOUSEINPUT(ctypes.Structure):
+    _fields_ = [('dx', ctypes.c_long), ('dy', ctypes.c_long),
+                ('mouseData', ctypes.c_ulong), ('dwFlags', ctypes.c_ulong),
+                ('time', ctypes.c_ulong), ('dwExtraInfo', ctypes.c_size_t)]
+
+
+class _KEYBDINPUT(ctypes.Structure):
+    _fields_ = [('wVk', ctypes.c_ushort), ('wScan', ctypes.c_ushort),
+                ('dwFlags', ctypes.c_ulong), ('time', ctypes.c_ulong),
+                ('dwExtraInfo', ctypes.c_size_t)]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [('mi', _MOUSEINPUT), ('ki', _KEYBDINPUT)]
+
+
+class _INPUT(ctypes.Structure):
+    _anonymous_ = ('u',)
+    _fields_ = [('type', ctypes.c_ulong), ('u', _INPUTUNION)]
+
+
+_INPUT_MOUSE = 0
+_INPUT_KEYBOARD = 1
+
+
+def _send_inputs(inputs):
+    """Inject a ctypes array of _INPUT events with ONE SendInput call (the events
+    are queued atomically, no other input can interleave)."""
+    sent = _user32.SendInput(len(inputs), inputs, ctypes.sizeof(_INPUT))
+    if sent != len(inputs):
+        raise ctypes.WinError(ctypes.get_last_error())
+
+
+def _send_key_taps(vk, count=1):
+    """Press and release virtual key vk count times in a single SendInput batch."""
+    inputs = (_INPUT * (2 * count))()
+    for i, event in enumerate(inputs):
+        event.type = _INPUT_KEYBOARD
+        event.ki.wVk = vk
+        event.ki.dwFlags = win32con.KEYEVENTF_KEYUP if i % 2 else 0
+    _send_inputs(inputs)
+
+
+def _click_at(x, y):
+    """Left-click at screen position (x, y): move the cursor, then send the button
+    down/up pair in a single SendInput batch."""
+    if not _user32.SetCursorPos(x, y):
+        raise ctypes.WinError(ctypes.get_last_error())
+    inputs = (_INPUT * 2)()
+    for event, flags in zip(inputs, (win32con.MOUSEEVENTF_LEFTDOWN, win32con.MOUSEEVENTF_LEFTUP)):
+        event.type = _INPUT_MOUSE
+        event.mi.dwFlags = flags
+    _send_inputs(inputs)
+
 # ============================================================
 # Configuration
 # ============================================================
-WAIT_AFTER_PAGE = 0.5  # Seconds to wait after a page-turn keypress (also the render poll interval)
-RENDER_POLL_TRIES = 5  # Max polls to wait for a page to render/advance before concluding "no advance"
-
-# Global flag for immediate stop
-STOP_FLAG = False
+WAIT_AFTER_PAGE = 0.5        # Seconds to wait after a page-turn keypress (key check / cover seek)
+RENDER_TIMEOUT = 2.5         # Seconds a turned page may take to render before concluding "no advance"
+RENDER_POLL_INTERVAL = 0.05  # Seconds between grabs while waiting for a turned page to render and settle
+RENDER_SETTLE_TIME = 0.3     # Seconds a changed page must stay unchanged before it counts as fully rendered
+PAGEUP_BURST = 10      # PageUp presses sent as one SendInput batch per step while seeking the cover
+SAVE_WORKERS = 2       # Background threads encoding/writing page PNGs while the next page is captured
+PNG_COMPRESS_LEVEL = 1 # zlib level for page PNGs: fastest encode, still lossless (OCR input)
+
+# Set by the keyboard hook / Ctrl+C (other threads) for immediate stop
+STOP_EVENT = threading.Event()
 keyboard_listener = None
 
 # ============================================================
@@ -85,15 +155,14 @@ STOP_KEYS = {keyboard.Key.esc, keyboard.Key.space, keyboard.Key.enter}
 
 def on_key_press(key):
     """Global keyboard hook - only Esc/Space/Enter or letter/number keys stop the script."""
-    global STOP_FLAG
     # Character keys (letters, numbers, punctuation) -> stop
     if isinstance(key, keyboard.KeyCode):
-        STOP_FLAG = True
+        STOP_EVENT.set()
         print("\n[!] Taste gedrueckt - stoppe...")
         return False
     # Specific stop keys -> stop
     if key in STOP_KEYS:
-        STOP_FLAG = True
+        STOP_EVENT.set()
         print("\n[!] Taste gedrueckt - stoppe...")
         return False
     # Everything else (F-keys, media keys, modifiers, etc.) -> ignore
@@ -114,41 +183,57 @@ def stop_keyboard_listener():
 
 def signal_handler(signum, frame):
     """Handle Ctrl+C signal."""
-    global STOP_FLAG
-    STOP_FLAG = True
+    STOP_EVENT.set()
     print("\n[!] Ctrl+C empfangen - stoppe...")
 
 signal.signal(signal.SIGINT, signal_handler)
 
-def check_stop():
-    """Check if stop was requested."""
-    return STOP_FLAG
-
 def check_stop_and_exit():
     """Check if stop was requested and exit if so."""
-    if STOP_FLAG:
+    if STOP_EVENT.is_set():
         stop_keyboard_listener()
         print("\n[GESTOPPT] Script vom Benutzer gestoppt.")
         sys.exit(1)
 
+def sleep_or_stop(seconds):
+    """Sleep, but wake up and exit as soon as a stop is requested (waits on
+    STOP_EVENT instead of sleeping blind and checking afterwards)."""
+    if STOP_EVENT.wait(seconds):
+        check_stop_and_exit()
+
 # ============================================================
 # Kindle Window Control
 # ============================================================
 
 def _get_window_class(hwnd):
     """Get Win32 window class name for a hwnd."""
-    import ctypes
     buf = ctypes.create_unicode_buffer(256)
-    ctypes.windll.user32.GetClassNameW(hwnd, buf, 256)
+    _user32.GetClassNameW(hwnd, buf, 256)
     return buf.value
 
 # Window classes to exclude (Explorer, WebView2, etc.)
 _EXCLUDED_CLASSES = {'CabinetWClass', 'ExplorerWClass', 'Shell_TrayWnd', 'Progman'}
 
+_kindle_window_cache = None  # Last Kindle window found by get_kindle_window
+
 def get_kindle_window():
     """Find main Kindle window by filtering out Explorer and WebView2 windows.
     The Kindle title contains 'Kindle' - but so does an Explorer window showing
-    a folder path with 'Kindle' in it. We use the window class to distinguish."""
+    a folder path with 'Kindle' in it. We use the window class to distinguish.
+    The window found is cached and reused as long as its hwnd is still a live
+    window titled 'Kindle' - the full enumeration + class lookups only run
+    when it is gone."""
+    global _kindle_window_cache
+    cached = _kindle_window_cache
+    if cached and win32gui.IsWindow(cached._hWnd) and 'Kindle' in win32gui.GetWindowText(cached._hWnd):
+        return cached
+
+    _kindle_window_cache = _find_kindle_window()
+    return _kindle_window_cache
+
+
+def _find_kindle_window():
+    """Enumerate all 'Kindle' windows and pick the Kindle app window."""
     windows = gw.getWindowsWithTitle('Kindle')
     if not windows:
         return None
@@ -256,8 +341,8 @@ def _click_reader_margin():
     if not kindle:
         print("[FEHLER] Kindle-Fenster fuer Fokus-Klick nicht gefunden!")
         sys.exit(1)
-    pyautogui.click(kindle.left + int(kindle.width * 0.15),
-                    kindle.top + kindle.height // 2)
+    _click_at(kindle.left + int(kindle.width * 0.15),
+              kindle.top + kindle.height // 2)
     time.sleep(0.5)
 
 
@@ -303,18 +388,22 @@ def wait_until_screen_stable(max_wait=8, interval=0.5, stable_needed=2, threshol
     'Drücke F11 zum Beenden' hint fading). Replaces the old OCR-based hint wait
     with a UI-independent screenshot-difference check."""
     print("[INFO] Warte bis Bildschirm stabil...")
-    prev = grab_kindle_screenshot()
+    def to_array(img):
+        return None if img is None else np.asarray(img)
+
+    # Each frame is converted once and kept as the reference for the next grab
+    prev = to_array(grab_kindle_screenshot())
     stable = 0
     waited = 0.0
     while waited < max_wait:
-        check_stop_and_exit()
-        time.sleep(interval)
+        sleep_or_stop(interval)
         waited += interval
-        cur = grab_kindle_screenshot()
-        if prev is not None and cur is not None and prev.size == cur.size:
-            a = np.asarray(prev, dtype=np.float32)
-            b = np.asarray(cur, dtype=np.float32)
-            d = float(np.mean(np.abs(a - b)))
+        cur = to_array(grab_kindle_screenshot())
+        if prev is not None and cur is not None and prev.shape == cur.shape:
+            # Mean absolute difference on the uint8 frames: max - min is the exact
+            # |a - b| without a widened copy, summed as integers
+            diff = np.maximum(prev, cur) - np.minimum(prev, cur)
+            d = int(diff.sum(dtype=np.uint64)) / diff.size
         else:
             d = 999.0
         prev = cur
@@ -372,18 +461,26 @@ def go_to_book_start():
             sys.exit(1)
         print("  [OK] Seitentasten wirken (PageUp hat geblaettert - Buch stand am Ende)")
 
-    last = grab_kindle_screenshot()
+    # PageUp in bursts: the reader buffers the key events, so one render wait
+    # per burst instead of per press. The cover is reached once bursts stop
+    # changing the page.
+    def grab_array():
+        shot = grab_kindle_screenshot()
+        return None if shot is None else np.asarray(shot)
+
+    # Frames kept as arrays: each is converted once, not again as the reference
+    last = grab_array()
     no_change = 0
     MAX_PAGEUP = 600
-    for i in range(MAX_PAGEUP):
+    for i in range(MAX_PAGEUP // PAGEUP_BURST):
         check_stop_and_exit()
-        pyautogui.press('pageup')
-        time.sleep(WAIT_AFTER_PAGE)
-        cur = grab_kindle_screenshot()
+        _send_key_taps(win32con.VK_PRIOR, PAGEUP_BURST)
+        sleep_or_stop(WAIT_AFTER_PAGE)
+        cur = grab_array()
         if images_are_similar(cur, last):
             no_change += 1
             if no_change >= 3:
-                print(f"  [OK] Cover erreicht (nach {i + 1} PageUp)")
+                print(f"  [OK] Cover erreicht (nach {(i + 1) * PAGEUP_BURST} PageUp)")
                 return
         else:
             no_change = 0
@@ -398,23 +495,32 @@ def press_next_page():
     pyautogui.press('pagedown')
 
 
-def press_prev_page():
-    """Turn to the previous page (PageUp). Relies on the reader keeping the keyboard
-    focus it got from the click in enter_fullscreen."""
-    pyautogui.press('pageup')
-
-
 # ============================================================
 # Kindle Preparation (Find, Navigate, Fullscreen)
 # ============================================================
 
+def _wait_until(condition, timeout, first_delay=0.05, max_delay=0.5):
+    """Poll condition() with exponential backoff (first_delay, doubling up to
+    max_delay) until it is true or timeout seconds have passed. Returns as soon
+    as the window manager is done instead of always sleeping the worst case.
+    Returns the last result of condition()."""
+    deadline = time.monotonic() + timeout
+    delay = first_delay
+    while not condition():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return condition()
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+    return True
+
+
 def find_and_activate_kindle():
     """Find the Kindle window and bring it to the foreground.
 
     Kindle must ALREADY be running with the book loaded - this tool does NOT
     launch Kindle itself (see the requirements in CLAUDE.md). Returns False (which
     aborts the run) if no Kindle window is found."""
-    import ctypes
 
     print("[INFO] Suche Kindle-Fenster...")
     kindle = get_kindle_window()
@@ -429,23 +535,28 @@ def find_and_activate_kindle():
     try:
         hwnd = kindle._hWnd
 
-        if kindle.isMinimized:
-            print("[INFO] Kindle ist minimiert - stelle wieder her...")
-            ctypes.windll.user32.ShowWindow(hwnd, 9)  # SW_RESTORE
-            time.sleep(1.0)
-
-        # Bring to foreground reliably using Win32 API
-        # Trick: simulate Alt key press to allow SetForegroundWindow from background process
-        ctypes.windll.user32.keybd_event(0x12, 0, 0, 0)  # Alt down
-        ctypes.windll.user32.keybd_event(0x12, 0, 2, 0)  # Alt up
-        ctypes.windll.user32.SetForegroundWindow(hwnd)
-        time.sleep(0.5)
-
-        # Verify and retry if needed
-        if ctypes.windll.user32.GetForegroundWindow() != hwnd:
-            ctypes.windll.user32.BringWindowToTop(hwnd)
-            ctypes.windll.user32.SetForegroundWindow(hwnd)
-            time.sleep(0.5)
+        def is_foreground():
+            return _user32.GetForegroundWindow() == hwnd
+
+        # Common case (re-run with Kindle still in front): nothing to activate
+        if is_foreground() and not _user32.IsIconic(hwnd):
+            print("[INFO] Kindle ist bereits im Vordergrund")
+        else:
+            if kindle.isMinimized:
+                print("[INFO] Kindle ist minimiert - stelle wieder her...")
+                _user32.ShowWindow(hwnd, 9)  # SW_RESTORE
+                _wait_until(lambda: not _user32.IsIconic(hwnd), timeout=1.0)
+
+            # Bring to foreground reliably using Win32 API
+            # Trick: simulate Alt key press to allow SetForegroundWindow from background process
+            _send_key_taps(win32con.VK_MENU)  # Alt down + up in one SendInput
+            _user32.SetForegroundWindow(hwnd)
+
+            # Verify and retry if needed
+            if not _wait_until(is_foreground, timeout=0.5):
+                _user32.BringWindowToTop(hwnd)
+                _user32.SetForegroundWindow(hwnd)
+                _wait_until(is_foreground, timeout=0.5)
     except Exception as e:
         print(f"[WARNUNG] Konnte Kindle nicht aktivieren: {e}")
         try:
@@ -507,12 +618,40 @@ def prepare_kindle_for_capture():
     print("[OK] Kindle bereit fuer Erfassung!")
     return book_region
 
-def _grab_window_printwindow(hwnd):
+# Memory DC + bitmap PrintWindow renders into: (width, height, dc, bitmap).
+# Created once and reused for every grab; recreated only when the size changes.
+_printwindow_target = None
+
+
+def _get_printwindow_target(window_dc, width, height):
+    """Memory DC with a selected bitmap of width x height, compatible with
+    window_dc. Reused across grabs instead of allocating a new window-sized
+    bitmap (several MB) per frame."""
+    global _printwindow_target
+    if _printwindow_target is not None:
+        cached_width, cached_height, save_dc, bitmap = _printwindow_target
+        if (cached_width, cached_height) == (width, height):
+            return save_dc, bitmap
+        save_dc.DeleteDC()
+        win32gui.DeleteObject(bitmap.GetHandle())
+        _printwindow_target = None
+    save_dc = window_dc.CreateCompatibleDC()
+    bitmap = win32ui.CreateBitmap()
+    bitmap.CreateCompatibleBitmap(window_dc, width, height)
+    save_dc.SelectObject(bitmap)
+    _printwindow_target = (width, height, save_dc, bitmap)
+    return save_dc, bitmap
+
+
+def _grab_window_printwindow(hwnd, region=None):
     """Capture a window's pixels via PrintWindow(PW_RENDERFULLCONTENT=2). This
     reads the window's own rendering (WinUI + WebView2 content), so it works even
     when the Kindle fullscreen is in an exclusive/protected mode that makes GDI
-    screen grab fail or return black. Returns a PIL Image, or None on failure."""
-    import ctypes
+    screen grab fail or return black. Returns a PIL Image, or None on failure.
+
+    With region=(left, top, right, bottom) in window coordinates only that part
+    is decoded from the bitmap (the rows outside it are never converted); None if
+    the region does not fit the window."""
 
     left, top, right, bottom = win32gui.GetWindowRect(hwnd)
     width, height = right - left, bottom - top
@@ -521,35 +660,40 @@ def _grab_window_printwindow(hwnd):
 
     hwnd_dc = win32gui.GetWindowDC(hwnd)
     mfc_dc = win32ui.CreateDCFromHandle(hwnd_dc)
-    save_dc = mfc_dc.CreateCompatibleDC()
-    bitmap = win32ui.CreateBitmap()
-    bitmap.CreateCompatibleBitmap(mfc_dc, width, height)
-    save_dc.SelectObject(bitmap)
     try:
+        save_dc, bitmap = _get_printwindow_target(mfc_dc, width, height)
         # PW_RENDERFULLCONTENT = 2 -> include DirectComposition / WebView2 content
-        result = ctypes.windll.user32.PrintWindow(hwnd, save_dc.GetSafeHdc(), 2)
+        result = _user32.PrintWindow(hwnd, save_dc.GetSafeHdc(), 2)
         info = bitmap.GetInfo()
         bits = bitmap.GetBitmapBits(True)
-        img = Image.frombuffer('RGB', (info['bmWidth'], info['bmHeight']),
-                               bits, 'raw', 'BGRX', 0, 1)
+        if region is None:
+            img = Image.frombuffer('RGB', (info['bmWidth'], info['bmHeight']),
+                                   bits, 'raw', 'BGRX', 0, 1)
+        elif region[2] > info['bmWidth'] or region[3] > info['bmHeight']:
+            img = None
+        else:
+            left, top, right, bottom = region
+            stride = info['bmWidth'] * 4  # 32bpp rows, no padding
+            rows = memoryview(bits)[top * stride:bottom * stride]
+            img = Image.frombuffer('RGB', (info['bmWidth'], bottom - top),
+                                   rows, 'raw', 'BGRX', 0, 1).crop((left, 0, right, bottom - top))
     finally:
-        win32gui.DeleteObject(bitmap.GetHandle())
-        save_dc.DeleteDC()
         mfc_dc.DeleteDC()
         win32gui.ReleaseDC(hwnd, hwnd_dc)
 
     return img if result == 1 else None
 
 
-def grab_kindle_screenshot(retries=4, delay=0.2):
-    """Capture the current Kindle window (the reading page) via PrintWindow.
+def grab_kindle_screenshot(retries=4, delay=0.2, region=None):
+    """Capture the current Kindle window (the reading page) via PrintWindow,
+    optionally only `region` (see _grab_window_printwindow).
     Returns a PIL Image, or None if the window is gone / capture keeps failing."""
     kindle = get_kindle_window()
     if not kindle:
         return None
     hwnd = kindle._hWnd
     for _ in range(retries):
-        img = _grab_window_printwindow(hwnd)
+        img = _grab_window_printwindow(hwnd, region)
         if img is not None:
             return img
         time.sleep(delay)
@@ -563,23 +707,22 @@ def grab_kindle_screenshot(retries=4, delay=0.2):
 BG_TOL = 10          # Per-channel difference from the letterbox colour that counts as page content
 MIN_COVERAGE = 0.5   # Fraction of a column/row that must be content for it to belong to the page
 
+# Page comparison
+SIMILARITY_BAND_ROWS = 64  # Rows compared per step; stops as soon as enough pixels have changed
+
 
 def _longest_run(flags):
     """Start and end (exclusive) of the longest contiguous True run in flags.
     The page is ONE solid block, so taking the longest run ignores stray
     single-pixel hits (e.g. the 1px window border column)."""
-    best_len = best_start = 0
-    cur = None
-    for i, v in enumerate(flags):
-        if v and cur is None:
-            cur = i
-        elif not v and cur is not None:
-            if i - cur > best_len:
-                best_len, best_start = i - cur, cur
-            cur = None
-    if cur is not None and len(flags) - cur > best_len:
-        best_len, best_start = len(flags) - cur, cur
-    return best_start, best_start + best_len
+    # Run boundaries from the rising/falling edges of the flags (vectorized)
+    d = np.diff(np.concatenate(([0], np.asarray(flags, dtype=np.int8), [0])))
+    starts = np.flatnonzero(d == 1)
+    ends = np.flatnonzero(d == -1)
+    if not starts.size:
+        return 0, 0
+    longest = int(np.argmax(ends - starts))  # First of equally long runs
+    return int(starts[longest]), int(ends[longest])
 
 
 def detect_page_region_from_cover(cover_img):
@@ -601,21 +744,30 @@ def detect_page_region_from_cover(cover_img):
                 would take it for page. But a real page row has BACKGROUND in the
                 side margins next to the page, whereas a chrome row does not.
                 That margin test is what separates page from chrome."""
-    a = np.asarray(cover_img.convert('RGB')).astype(np.int16)
+    a = np.asarray(cover_img.convert('RGB'))
     height, width, _ = a.shape
 
     # Letterbox colour: the far-left/far-right edge strips over the vertical middle
     # are always uniform margin, because the page is centred horizontally.
-    band = a[int(height * 0.25):int(height * 0.75)]
-    bg = np.median(np.concatenate([band[:, :10], band[:, -10:]], axis=1).reshape(-1, 3), axis=0)
-    mask = np.abs(a - bg).max(axis=2) > BG_TOL  # True = page content, False = letterbox
-
-    left, right = _longest_run(mask.mean(axis=0) > MIN_COVERAGE)
-
-    inside = mask[:, left:right].mean(axis=1) > MIN_COVERAGE
-    margin = np.concatenate([mask[:, :left], mask[:, right:]], axis=1)
+    edges = np.r_[0:10, width - 10:width]
+    strips = a[int(height * 0.25):int(height * 0.75), edges]
+    bg = np.median(strips.reshape(-1, 3), axis=0)
+    # |pixel - bg| > BG_TOL as integer bounds per channel, compared on the uint8
+    # image directly (no signed/float copy of the whole screenshot)
+    hi = np.clip(np.floor(bg + BG_TOL), 0, 255).astype(np.uint8)
+    lo = np.clip(np.ceil(bg - BG_TOL), 0, 255).astype(np.uint8)
+    mask = ((a > hi) | (a < lo)).any(axis=2)  # True = page content, False = letterbox
+
+    # Coverage from per-column/per-row content counts; the margin count is the
+    # row total minus the page part, so the margin columns are never copied out.
+    left, right = _longest_run(np.count_nonzero(mask, axis=0) / height > MIN_COVERAGE)
+
+    row_total = np.count_nonzero(mask, axis=1)
+    row_inside = np.count_nonzero(mask[:, left:right], axis=1)
+    inside = row_inside / (right - left) > MIN_COVERAGE if right > left else np.zeros(height, bool)
+    margin_width = width - (right - left)
     # No margin at all (page spans the full width) -> the margin test cannot apply.
-    outside_clear = (margin.mean(axis=1) < MIN_COVERAGE) if margin.size else np.ones(height, bool)
+    outside_clear = ((row_total - row_inside) / margin_width < MIN_COVERAGE) if margin_width else np.ones(height, bool)
     top, bottom = _longest_run(inside & outside_clear)
 
     pw, ph = right - left, bottom - top
@@ -645,22 +797,39 @@ def images_are_similar(img1, img2, change_threshold=0.006, pixel_diff=24):
     background and wrongly reports 'no change' for two clearly different sparse pages.
     Counting changed pixels is robust: measured on real pages a page turn changes
     ~5-37% of pixels, while an unchanged page changes 0%. So anything below ~0.6% is
-    treated as 'no turn'."""
+    treated as 'no turn'.
+
+    Accepts PIL images or their numpy arrays - callers that compare one reference
+    against several frames convert it once and pass the array.
+
+    The images are compared in bands of SIMILARITY_BAND_ROWS rows: a turned page
+    exceeds the changed-pixel budget within the first bands, so the rest of the
+    frame is never diffed. The result is the same as for a full-frame diff."""
     if img1 is None or img2 is None:
         return False
 
-    if img1.size != img2.size:
+    a = np.asarray(img1)
+    b = np.asarray(img2)
+    if a.shape != b.shape:
         return False
 
-    a = np.asarray(img1).astype(np.int16)
-    b = np.asarray(img2).astype(np.int16)
-    if a.ndim == 3:
-        diff = np.abs(a - b).max(axis=2)
-    else:
-        diff = np.abs(a - b)
-
-    changed_fraction = float(np.mean(diff > pixel_diff))
-    return changed_fraction < change_threshold
+    max_changed = change_threshold * a.shape[0] * a.shape[1]
+    changed = 0
+    for start in range(0, a.shape[0], SIMILARITY_BAND_ROWS):
+        band_a, band_b = a[start:start + SIMILARITY_BAND_ROWS], b[start:start + SIMILARITY_BAND_ROWS]
+        # Exact |a - b| on uint8 (max - min never underflows) - no int16 widening
+        diff = np.maximum(band_a, band_b) - np.minimum(band_a, band_b)
+        if diff.ndim == 3:
+            diff = diff.max(axis=2)
+        changed += np.count_nonzero(diff > pixel_diff)
+        if changed >= max_changed:
+            return False
+        # First band within budget: likely the same page (not turned / not
+        # rendered yet - the common polling case). If the rest is byte-identical,
+        # one equality pass settles it, far cheaper than diffing every band
+        if start == 0 and np.array_equal(a[SIMILARITY_BAND_ROWS:], b[SIMILARITY_BAND_ROWS:]):
+            return True
+    return True
 
 # ============================================================
 # Main Functions
@@ -668,22 +837,22 @@ def images_are_similar(img1, img2, change_threshold=0.006, pixel_diff=24):
 
 def clear_output_folder(folder):
     """Delete all existing PNG files in output folder."""
-    png_files = list(folder.glob("page_*.png"))
+    # One directory enumeration, plain name tests (no Path per entry)
+    with os.scandir(folder) as entries:
+        png_files = [e.path for e in entries
+                     if e.name.startswith("page_") and e.name.endswith(".png") and e.is_file()]
     if png_files:
         print(f"[INFO] Loesche {len(png_files)} existierende Seitendateien...")
         for f in png_files:
-            f.unlink()
+            os.unlink(f)
         print(f"[OK] Ausgabeordner geleert")
 
-def _save_page(output_folder, page_num, image):
-    """Save one captured page image and wait until it is on disk."""
-    filename = f"page_{page_num:04d}.png"
-    filepath = output_folder / filename
-    image.save(filepath, "PNG")
-    while not filepath.exists():
-        check_stop_and_exit()
-        time.sleep(0.05)
-    print(f"[OK] Gespeichert: {filename}")
+def _save_page(path_format, page_num, image):
+    """Save one captured page image to path_format.format(page_num). save() is
+    synchronous - the file is complete on disk when it returns."""
+    filepath = path_format.format(page_num)
+    image.save(filepath, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+    print(f"[OK] Gespeichert: {os.path.basename(filepath)}")
 
 
 def capture_pages(output_folder, book_region):
@@ -693,9 +862,13 @@ def capture_pages(output_folder, book_region):
     A page turn is verified by watching for the page image to change. Crucially,
     on a 'no change' we do NOT turn again while waiting - a page that simply
     renders slowly would otherwise be skipped. Only after the page fails to change
-    across RENDER_POLL_TRIES polls (and one re-focus click + retry) do we conclude
-    the end of the book has been reached."""
-    global STOP_FLAG
+    within RENDER_TIMEOUT (and one re-focus click + retry) do we conclude the end
+    of the book has been reached.
+
+    The only comparison state is the last saved page (one array): a turn is
+    checked against the immediately preceding page, never against all earlier
+    pages. Legitimately repeated pages (blank pages, separators) must be kept,
+    so there is deliberately no global duplicate index."""
 
     # Window size the crop region was measured on. book_region is fixed for the
     # whole run, so if the window is resized (or drops out of fullscreen) midway,
@@ -704,75 +877,119 @@ def capture_pages(output_folder, book_region):
 
     def grab_page():
         nonlocal expected_size
-        shot = grab_kindle_screenshot()
-        if shot is None:
+        kindle = get_kindle_window()
+        if not kindle:
             return None
+        size = (kindle.width, kindle.height)
         if expected_size is None:
-            expected_size = shot.size
-            if book_region[2] > shot.size[0] or book_region[3] > shot.size[1]:
+            expected_size = size
+            if book_region[2] > size[0] or book_region[3] > size[1]:
                 print(f"[FEHLER] Titelseiten-Format {book_region} passt nicht ins "
-                      f"Fenster {shot.size}!")
+                      f"Fenster {size}!")
                 sys.exit(1)
-        elif shot.size != expected_size:
+        elif size != expected_size:
             print(f"[FEHLER] Fenstergroesse hat sich waehrend der Erfassung geaendert: "
-                  f"{expected_size} -> {shot.size}")
+                  f"{expected_size} -> {size}")
             print("[FEHLER] Der Zuschnitt auf das Titelseiten-Format waere ab hier falsch.")
             print("[FEHLER] Kindle-Fenster waehrend des Laufs NICHT veraendern!")
             sys.exit(1)
-        return shot.crop(book_region)
+        # Only the page region is decoded from the window bitmap
+        return grab_kindle_screenshot(region=book_region)
 
     def wait_for_new_page(reference):
-        """Poll (without turning the page) until the page differs from `reference`,
-        giving a slow render time to appear. Returns the new page image, or None if
-        it never changes (book did not advance)."""
-        for _ in range(RENDER_POLL_TRIES):
-            check_stop_and_exit()
-            time.sleep(WAIT_AFTER_PAGE)
+        """Poll (without turning the page) until the page differs from `reference`
+        (the last saved page as a numpy array, converted once per page), giving a
+        slow render time to appear. Returns (image, array) of the new page - the
+        array becomes the next reference as is, it is not converted again - or
+        None if it never changes (book did not advance).
+
+        Polls every RENDER_POLL_INTERVAL instead of sleeping a fixed interval, so
+        a fast render is picked up right away. A changed frame is only accepted
+        once it has stayed unchanged for RENDER_SETTLE_TIME (rendering has
+        settled, late-loading images are in - no half-drawn page); if it never
+        settles, the last changed frame at RENDER_TIMEOUT is used. "Unchanged"
+        uses the same images_are_similar tolerance as the turn test, so a
+        flickering cursor or compositor noise does not hold off the settle."""
+        deadline = time.monotonic() + RENDER_TIMEOUT
+        changed = None
+        changed_since = 0.0
+        while time.monotonic() < deadline:
+            sleep_or_stop(RENDER_POLL_INTERVAL)
             cur = grab_page()
-            if cur is not None and not images_are_similar(cur, reference):
-                return cur
-        return None
+            if cur is None:
+                continue
+            cur_array = np.asarray(cur)
+            if changed is not None and images_are_similar(cur_array, changed[1]):
+                changed = (cur, cur_array)
+                if time.monotonic() - changed_since >= RENDER_SETTLE_TIME:
+                    return changed
+                continue
+            if images_are_similar(cur_array, reference):
+                changed = None
+            else:
+                changed = (cur, cur_array)
+                changed_since = time.monotonic()
+        return changed
 
     page_num = 1
-    try:
-        # Save the first (current) page = cover
-        current = grab_page()
-        if current is None:
-            print("[FEHLER] Kindle-Fenster verloren!")
-            return 0
-        _save_page(output_folder, page_num, current)
+    pending_saves = deque()
+    # Page file path as a plain format string, built once (no Path per page).
+    # Braces in the folder name (e.g. "Buch {2024}") are escaped for format().
+    folder = str(output_folder).replace("{", "{{").replace("}", "}}")
+    path_format = os.path.join(folder, "page_{:04d}.png")
+
+    def save_page(image):
+        """Queue the PNG encode + write on the save pool, so the next page turn
+        overlaps it. Finished saves are checked right away: a failed write
+        (disk full, ...) aborts the run instead of going unnoticed."""
+        nonlocal page_num
+        pending_saves.append(save_pool.submit(_save_page, path_format, page_num, image))
         page_num += 1
-        last_saved = current
-
-        while True:
-            check_stop_and_exit()
-            press_next_page()
-            new_page = wait_for_new_page(last_saved)
-
-            if new_page is None:
-                # No advance: might be end of book, or the reader lost keyboard
-                # focus (e.g. foreground was stolen). Re-activate and re-focus the
-                # reader with a click, wait for the click's chrome to fade again,
-                # then give it one more chance before concluding "end".
-                print("[INFO] Keine Aenderung - pruefe Buchende / Fokus...")
-                find_and_activate_kindle()
-                _click_reader_margin()
-                park_mouse_center()
-                wait_until_screen_stable(max_wait=6)
+        while pending_saves and pending_saves[0].done():
+            pending_saves.popleft().result()
+
+    with ThreadPoolExecutor(max_workers=SAVE_WORKERS) as save_pool:
+        try:
+            # Save the first (current) page = cover
+            current = grab_page()
+            if current is None:
+                print("[FEHLER] Kindle-Fenster verloren!")
+                return 0
+            save_page(current)
+            last_saved = np.asarray(current)
+
+            while True:
+                check_stop_and_exit()
                 press_next_page()
                 new_page = wait_for_new_page(last_saved)
-                if new_page is None:
-                    print("[OK] Buchende erreicht.")
-                    break
-
-            _save_page(output_folder, page_num, new_page)
-            page_num += 1
-            last_saved = new_page
 
-    except KeyboardInterrupt:
-        print("\n[INFO] Erfassung vom Benutzer gestoppt.")
-    except SystemExit:
-        raise
+                if new_page is None:
+                    # No advance: might be end of book, or the reader lost keyboard
+                    # focus (e.g. foreground was stolen). Re-activate and re-focus the
+                    # reader with a click, wait for the click's chrome to fade again,
+                    # then give it one more chance before concluding "end".
+                    print("[INFO] Keine Aenderung - pruefe Buchende / Fokus...")
+                    find_and_activate_kindle()
+                    _click_reader_margin()
+                    park_mouse_center()
+                    wait_until_screen_stable(max_wait=6)
+                    press_next_page()
+                    new_page = wait_for_new_page(last_saved)
+                    if new_page is None:
+                        print("[OK] Buchende erreicht.")
+                        break
+
+                new_image, last_saved = new_page
+                save_page(new_image)
+
+        except KeyboardInterrupt:
+            print("\n[INFO] Erfassung vom Benutzer gestoppt.")
+        except SystemExit:
+            raise
+        finally:
+            # Every captured page is written before returning (also on stop)
+            while pending_saves:
+                pending_saves.popleft().result()
 
     return page_num - 1
 
@@ -781,7 +998,6 @@ def keep_session_awake(enable=True):
     during a long capture run. Synthetic pyautogui input does NOT reset Windows'
     idle timer, so without this a multi-minute capture can end up on the lock
     screen - where keyboard input no longer reaches Kindle and paging dies."""
-    import ctypes
     ES_CONTINUOUS = 0x80000000
     ES_SYSTEM_REQUIRED = 0x00000001
     ES_DISPLAY_REQUIRED = 0x00000002
@@ -794,8 +1010,7 @@ def keep_session_awake(enable=True):
 
 def main():
     """Main function - capture book pages."""
-    global STOP_FLAG
-    STOP_FLAG = False
+    STOP_EVENT.clear()
 
     print("=" * 60)
     print("  KINDLE BUCH ERFASSUNG")
@@ -849,7 +1064,7 @@ def main():
 
     print()
     print("=" * 60)
-    if STOP_FLAG:
+    if STOP_EVENT.is_set():
         print("  ERFASSUNG ABGEBROCHEN")
         print("=" * 60)
         print(f"  Erfasste Seiten: {captured_pages}")
@@ -0,0 +1,61 @@
+"""
+analyze_page on box-reduced pages must give the same verdict as the
+full-resolution analysis (analyze_page_array on the unreduced page).
+
+Run: python -m unittest discover tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import create_markdown as cm
+
+
+def synthetic_page(width, line_h, gap, gfx_h, rng):
+    """White page with text-like lines (dark glyph columns) and an optional
+    noise block (graphic) of gfx_h rows. Returns (gray array, OCR line dicts in
+    full-resolution pixels)."""
+    height = 1800 if width < 1500 else 2600
+    page = np.full((height, width), 255, np.uint8)
+    lines = []
+    gfx_top = height // 3 if gfx_h else -1
+    y = 40
+    while y + line_h < height - 40:
+        if gfx_h and gfx_top <= y < gfx_top + gfx_h:
+            page[y:y + gfx_h, 100:width - 100] = rng.integers(0, 256, (gfx_h, width - 200))
+            y += gfx_h + gap
+            continue
+        glyphs = rng.random(width - 160) < 0.35
+        page[y:y + line_h, 80:width - 80][:, glyphs] = 20
+        lines.append({'text': 'wort ' * 8, 'word_count': 8, 'y': y, 'height': line_h})
+        y += line_h + gap
+    return page, lines
+
+
+class AnalyzeReducedPageTest(unittest.TestCase):
+
+    def check_factor(self, width):
+        factor = width // cm.ANALYSIS_WIDTH
+        rng = np.random.default_rng(width)
+        for line_h in (6, 8, 9, 11, 12, 17, 24, 30):
+            for gap in (3, 10, 18):
+                for gfx_h in (0, 3 * line_h, 5 * line_h, 200):
+                    page, lines = synthetic_page(width, line_h, gap, gfx_h, rng)
+                    with self.subTest(factor=factor, line_h=line_h, gap=gap, gfx_h=gfx_h):
+                        self.assertEqual(cm.analyze_page(Image.fromarray(page), lines),
+                                         cm.analyze_page_array(page, lines))
+
+    def test_factor_2(self):
+        self.check_factor(1300)
+
+    def test_factor_3(self):
+        self.check_factor(1900)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+is_text_only_image must give the same verdict as the baseline analysis (row
+variance/mean and the longest content run on the full-resolution page), also
+for wide images and tight line gaps.
+
+Run: python -m unittest discover tests
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import cleanup_images as ci
+
+
+def baseline_is_text_only(gray):
+    """The original row-by-row analysis on a float grayscale array."""
+    gray = gray.astype(float)
+    content_rows = (np.var(gray, axis=1) > 100) & (np.mean(gray, axis=1) < 245)
+    max_consecutive = current = 0
+    for c in content_rows:
+        current = current + 1 if c else 0
+        max_consecutive = max(max_consecutive, current)
+    return not max_consecutive > 60
+
+
+def synthetic_image(width, line_h, gap, gfx_h, rng):
+    """White image with text-like lines (dark glyph columns) and an optional
+    noise block (graphic) of gfx_h rows."""
+    height = 1400
+    page = np.full((height, width), 255, np.uint8)
+    gfx_top = height // 3 if gfx_h else -1
+    y = 30
+    while y + line_h < height - 30:
+        if gfx_h and gfx_top <= y < gfx_top + gfx_h:
+            page[y:y + gfx_h, 60:width - 60] = rng.integers(0, 256, (gfx_h, width - 120))
+            y += gfx_h + gap
+            continue
+        glyphs = rng.random(width - 100) < 0.35
+        page[y:y + line_h, 50:width - 50][:, glyphs] = 20
+        y += line_h + gap
+    return page
+
+
+class TextOnlyImageTest(unittest.TestCase):
+
+    def check_width(self, width):
+        rng = np.random.default_rng(width)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'page_0001.png'
+            for line_h in (8, 12, 20, 30):
+                for gap in (1, 2, 3, 10):
+                    for gfx_h in (0, 55, 61, 65, 120):
+                        page = synthetic_image(width, line_h, gap, gfx_h, rng)
+                        Image.fromarray(page).save(path)
+                        with self.subTest(width=width, line_h=line_h, gap=gap, gfx_h=gfx_h):
+                            self.assertEqual(ci.is_text_only_image(path),
+                                             baseline_is_text_only(page))
+
+    def test_narrow(self):
+        self.check_width(700)
+
+    def test_image_max_width(self):
+        self.check_width(1200)
+
+    def test_wide(self):
+        self.check_width(1900)
+
+
+if __name__ == '__main__':
+    unittest.main()